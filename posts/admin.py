@@ -1,34 +1,84 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models.functions import Substr
 from .models import Post, Comment, Like, Share
 
 
+PREVIEW_LENGTH = 50
+
+
+class PreviewChangeList(ChangeList):
+    """
+    Changelist that loads a truncated `content` preview from SQL.
+
+    Only the columns named in the admin's `preview_fields` are loaded, so the
+    full `content` column never leaves the database for list pages. Other
+    admin views keep fetching complete rows.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).annotate(
+            preview=Substr('content', 1, PREVIEW_LENGTH + 1)
+        ).only(*self.model_admin.preview_fields)
+
+
+class PreviewLabel:
+    """Stand-in passed to the action checkbox so its label avoids `str(obj)`"""
+
+    def __init__(self, obj, label):
+        self.pk = obj.pk
+        self.label = label
+
+    def __str__(self):
+        return self.label
+
+
+class ContentPreviewAdmin(admin.ModelAdmin):
+    preview_fields = ()
+    
+    def get_changelist(self, request, **kwargs):
+        return PreviewChangeList
+    
+    def action_checkbox(self, obj):
+        # The checkbox label is str(obj), which may read the deferred content
+        return super().action_checkbox(PreviewLabel(obj, self.preview_label(obj)))
+    
+    def preview_label(self, obj):
+        return str(obj)
+    
+    def content_preview(self, obj):
+        preview = obj.preview
+        return preview[:PREVIEW_LENGTH] + '...' if len(preview) > PREVIEW_LENGTH else preview
+    content_preview.short_description = 'Content'
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ContentPreviewAdmin):
     list_display = ('id', 'author', 'content_preview', 'created_at', 'likes_count', 'comments_count', 'shares_count')
+    list_select_related = ('author',)
     list_filter = ('created_at', 'author')
     search_fields = ('content', 'author__username')
     readonly_fields = ('created_at', 'updated_at', 'likes_count', 'comments_count', 'shares_count')
+    preview_fields = ('id', 'author', 'created_at', 'likes_count', 'comments_count', 'shares_count')
     
-    def content_preview(self, obj):
-        return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
-    content_preview.short_description = 'Content'
+    def preview_label(self, obj):
+        return f"{obj.author.username}: {obj.preview[:PREVIEW_LENGTH]}"
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ContentPreviewAdmin):
     list_display = ('id', 'author', 'post', 'content_preview', 'created_at')
+    list_select_related = ('author', 'post', 'post__author')
     list_filter = ('created_at', 'author')
     search_fields = ('content', 'author__username')
     readonly_fields = ('created_at',)
-    
-    def content_preview(self, obj):
-        return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
-    content_preview.short_description = 'Content'
+    preview_fields = ('id', 'author', 'post', 'created_at')
 
 
 @admin.register(Like)
 class LikeAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'post', 'created_at')
+    list_select_related = ('user', 'post', 'post__author')
     list_filter = ('created_at', 'user')
     search_fields = ('user__username', 'post__content')
     readonly_fields = ('created_at',)
@@ -37,6 +87,7 @@ class LikeAdmin(admin.ModelAdmin):
 @admin.register(Share)
 class ShareAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'post', 'created_at')
+    list_select_related = ('user', 'post', 'post__author')
     list_filter = ('created_at', 'user')
     search_fields = ('user__username', 'post__content')
     readonly_fields = ('created_at',)
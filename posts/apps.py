@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .persisted_queries import load_persisted_documents
+        load_persisted_documents()
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Post
+
+
+def post_cache_key(post_id):
+    return f"post:{post_id}"
+
+
+def get_cached_post(post_id):
+    """
+    Read-through cache for a single post.
+
+    Returns None if the post does not exist. Only the post row is cached so
+    that any GraphQL selection on the post can be served from the cached
+    instance; the author is resolved per request, which keeps user data such
+    as the password hash out of the cache and never serves a stale profile.
+    """
+    key = post_cache_key(post_id)
+    post = cache.get(key)
+    if post is None:
+        try:
+            post = Post.objects.get(pk=post_id)
+        except Post.DoesNotExist:
+            return None
+        cache.set(key, post, settings.CACHE_TTL)
+    return post
+
+
+def invalidate_post(post_id):
+    """Drop the cached post once the current transaction commits"""
+    key = post_cache_key(post_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_posts(post_ids):
+    """Drop several cached posts once the current transaction commits"""
+    keys = [post_cache_key(post_id) for post_id in post_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
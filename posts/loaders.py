@@ -0,0 +1,127 @@
+from collections import defaultdict
+
+from .models import Comment, Like, Post, Share
+
+
+class Loader:
+    """
+    Per-request batch loader keyed by id.
+
+    Keys are registered with `prime()` as parent resolvers return them. The
+    first `load()` for any of those keys fetches all pending keys with a
+    single `batch_load()` call, so nothing is queried unless the GraphQL
+    selection actually asks for it.
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self._cache = {}
+
+    def prime(self, keys):
+        """Register keys to be included in the next batch"""
+        self._pending.update(key for key in keys if key not in self._cache)
+
+    def load(self, key):
+        """Return the value for a key, batching pending keys"""
+        if key not in self._cache:
+            self._pending.add(key)
+            self._dispatch()
+        return self._cache[key]
+
+    def batch_load(self, keys):
+        """Return a mapping of key to value for the given keys"""
+        raise NotImplementedError
+
+    def default(self, key):
+        return None
+
+    def _dispatch(self):
+        keys, self._pending = self._pending, set()
+        values = self.batch_load(keys)
+        for key in keys:
+            self._cache[key] = values.get(key, self.default(key))
+
+
+class PostLoader(Loader):
+    def batch_load(self, post_ids):
+        return Post.objects.select_related('author').in_bulk(post_ids)
+
+
+class RelatedByPostLoader(Loader):
+    """Batch loader for a reverse relation of Post, keyed by post id"""
+    queryset = None
+
+    def batch_load(self, post_ids):
+        grouped = defaultdict(list)
+        for obj in self.queryset.filter(post_id__in=post_ids):
+            grouped[obj.post_id].append(obj)
+        return grouped
+
+    def default(self, post_id):
+        return []
+
+
+class CommentsByPostLoader(RelatedByPostLoader):
+    queryset = Comment.objects.select_related('author')
+
+
+class LikesByPostLoader(RelatedByPostLoader):
+    queryset = Like.objects.select_related('user')
+
+
+class SharesByPostLoader(RelatedByPostLoader):
+    queryset = Share.objects.select_related('user')
+
+
+class LikedByUserLoader(Loader):
+    """Batch loader answering whether a user liked each post, keyed by post id"""
+
+    def __init__(self, user_id):
+        super().__init__()
+        self.user_id = user_id
+
+    def batch_load(self, post_ids):
+        liked = Like.objects.filter(
+            user_id=self.user_id, post_id__in=post_ids
+        ).values_list('post_id', flat=True)
+        return {post_id: True for post_id in liked}
+
+    def default(self, post_id):
+        return False
+
+
+class Loaders:
+    """Per-request container for the post loaders"""
+
+    def __init__(self, user_id=None):
+        self.posts = PostLoader()
+        self.comments = CommentsByPostLoader()
+        self.likes = LikesByPostLoader()
+        self.shares = SharesByPostLoader()
+        self.liked = LikedByUserLoader(user_id) if user_id is not None else None
+
+    def prime(self, posts):
+        post_ids = [post.id for post in posts]
+        self.comments.prime(post_ids)
+        self.likes.prime(post_ids)
+        self.shares.prime(post_ids)
+        if self.liked is not None:
+            self.liked.prime(post_ids)
+
+
+def get_loaders(info):
+    """Return the loaders attached to the request, creating them on first use"""
+    loaders = getattr(info.context, 'loaders', None)
+    if loaders is None:
+        user = getattr(info.context, 'user', None)
+        user_id = user.id if user is not None and user.is_authenticated else None
+        loaders = Loaders(user_id)
+        info.context.loaders = loaders
+    return loaders
+
+
+def load_post(obj, info):
+    """Resolve `obj.post`, reusing the instance if it is already loaded"""
+    if type(obj).post.is_cached(obj):
+        return obj.post
+    return get_loaders(info).posts.load(obj.post_id)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.cache import invalidate_posts
+from posts.models import Comment, Like, Post, Share
+
+
+def related_count(model):
+    """Subquery counting the rows of `model` that belong to the outer post"""
+    counts = model.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(
+        count=Count('*')
+    ).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached likes, comments and shares counters on every post"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted_ids = list(
+                Post.objects.annotate(
+                    actual_likes=related_count(Like),
+                    actual_comments=related_count(Comment),
+                    actual_shares=related_count(Share),
+                ).exclude(
+                    likes_count=F('actual_likes'),
+                    comments_count=F('actual_comments'),
+                    shares_count=F('actual_shares'),
+                ).values_list('pk', flat=True)
+            )
+            updated = Post.objects.filter(pk__in=drifted_ids).update(
+                likes_count=related_count(Like),
+                comments_count=related_count(Comment),
+                shares_count=related_count(Share),
+            )
+            # Queryset updates send no signals, so drop the cached posts here
+            invalidate_posts(drifted_ids)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled counters on {updated} posts"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-15 00:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_post_id_7929fe_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='like',
+            name='posts_like_post_id_d262ec_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created_at'], include=('author',), name='comment_post_created_covering'),
+        ),
+        migrations.AddIndex(
+            model_name='share',
+            index=models.Index(fields=['post', '-created_at'], include=('user',), name='share_post_created_covering'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat, Length, Substr
+
+
+def strip_cdn_base(apps, schema_editor):
+    if not settings.CDN_BASE_URL:
+        return
+    Post = apps.get_model('posts', 'Post')
+    prefix = f"{settings.CDN_BASE_URL}/"
+    Post.objects.filter(image_key__startswith=prefix).update(
+        image_key=Substr('image_key', len(prefix) + 1, Length('image_key'))
+    )
+
+
+def prepend_cdn_base(apps, schema_editor):
+    if not settings.CDN_BASE_URL:
+        return
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.exclude(image_key__isnull=True).exclude(image_key='').exclude(
+        image_key__contains='://'
+    ).update(image_key=Concat(Value(f"{settings.CDN_BASE_URL}/"), 'image_key'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_like_user_post_index'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='post',
+            old_name='image_url',
+            new_name='image_key',
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image_key',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.RunPython(strip_cdn_base, prepend_cdn_base),
+    ]
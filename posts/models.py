@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 
 
@@ -9,7 +12,7 @@ class Post(models.Model):
     Attributes:
         author (User): The user who created the post
         content (str): The text content of the post
-        image_url (str): Optional URL to an image
+        image_key (str): Optional CDN object key (or absolute URL) of an image
         created_at (datetime): Timestamp when post was created
         updated_at (datetime): Timestamp when post was last updated
         likes_count (int): Cached count of likes
@@ -18,7 +21,7 @@ class Post(models.Model):
     """
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField()
-    image_url = models.URLField(blank=True, null=True)
+    image_key = models.CharField(max_length=200, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     likes_count = models.IntegerField(default=0)
@@ -30,10 +33,26 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['author', '-created_at']),
+            # Admin content searches run UPPER(content) LIKE '%...%'
+            GinIndex(OpClass(Upper('content'), name='gin_trgm_ops'), name='post_content_upper_trgm'),
         ]
     
     def __str__(self):
         return f"{self.author.username}: {self.content[:50]}"
+    
+    @property
+    def image_url(self):
+        """Full image URL, built from the CDN base for stored object keys"""
+        if not self.image_key or '://' in self.image_key or not settings.CDN_BASE_URL:
+            return self.image_key
+        return f"{settings.CDN_BASE_URL}/{self.image_key}"
+    
+    @image_url.setter
+    def image_url(self, url):
+        prefix = f"{settings.CDN_BASE_URL}/"
+        if url and settings.CDN_BASE_URL and url.startswith(prefix):
+            url = url[len(prefix):]
+        self.image_key = url
 
 
 class Comment(models.Model):
@@ -54,7 +73,11 @@ class Comment(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['post', '-created_at']),
+            models.Index(
+                fields=['post', '-created_at'],
+                include=['author'],
+                name='comment_post_created_covering',
+            ),
         ]
     
     def __str__(self):
@@ -77,8 +100,7 @@ class Like(models.Model):
     class Meta:
         unique_together = ['post', 'user']
         indexes = [
-            models.Index(fields=['post', 'user']),
-            models.Index(fields=['user']),
+            models.Index(fields=['user', 'post'], name='like_user_post_covering'),
         ]
     
     def __str__(self):
@@ -100,6 +122,13 @@ class Share(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['post', '-created_at'],
+                include=['user'],
+                name='share_post_created_covering',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} shared post {self.post.id}"
@@ -0,0 +1,51 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from graphene_django.settings import graphene_settings
+from graphql import parse
+from graphql.validation import validate
+
+# Query id -> parsed and validated DocumentNode, filled at startup
+_documents = {}
+
+
+def query_id(query):
+    """Return the id a client uses for a persisted query: its SHA-256 hex digest"""
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+def load_persisted_documents():
+    """
+    Parse and validate every query in the persisted queries manifest.
+
+    The manifest is a JSON object mapping query ids to query strings, as
+    extracted from the client at build time. This runs once at startup so a
+    bad manifest fails the deploy instead of individual requests.
+    """
+    documents = {}
+    path = settings.GRAPHQL_PERSISTED_QUERIES_MANIFEST
+    if path:
+        with open(path, encoding='utf-8') as manifest_file:
+            manifest = json.load(manifest_file)
+        
+        schema = graphene_settings.SCHEMA.graphql_schema
+        for persisted_id, query in manifest.items():
+            if query_id(query) != persisted_id:
+                raise ImproperlyConfigured(f"Persisted query {persisted_id} does not match its SHA-256 hash")
+            document = parse(query)
+            errors = validate(schema, document)
+            if errors:
+                raise ImproperlyConfigured(f"Persisted query {persisted_id} is invalid: {errors[0].message}")
+            documents[persisted_id] = document
+    
+    _documents.clear()
+    _documents.update(documents)
+
+
+def get_persisted_document(persisted_id):
+    """Return the pre-parsed, pre-validated document for a query id, if known"""
+    if not persisted_id:
+        return None
+    return _documents.get(persisted_id)
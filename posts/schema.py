@@ -1,7 +1,14 @@
 import graphene
 from graphene_django import DjangoObjectType
 from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from .models import Post, Comment, Like, Share
+from .cache import get_cached_post, invalidate_post
+from .loaders import get_loaders, load_post
+from .utils import project_fields
 
 
 # GraphQL Types
@@ -11,28 +18,63 @@ class UserType(DjangoObjectType):
         fields = ('id', 'username', 'email', 'first_name', 'last_name')
 
 
+# Computed PostType fields and the Post columns they read
+POST_FIELD_SOURCES = {
+    'image_url': ('image_key',),
+}
+
+
 class PostType(DjangoObjectType):
+    image_url = graphene.String()
+    liked_by_me = graphene.Boolean()
+    
     class Meta:
         model = Post
-        fields = '__all__'
+        exclude = ('image_key',)
+    
+    def resolve_liked_by_me(self, info):
+        liked = get_loaders(info).liked
+        return liked.load(self.id) if liked is not None else False
+    
+    def resolve_comments(self, info):
+        return get_loaders(info).comments.load(self.id)
+    
+    def resolve_likes(self, info):
+        return get_loaders(info).likes.load(self.id)
+    
+    def resolve_shares(self, info):
+        return get_loaders(info).shares.load(self.id)
 
 
 class CommentType(DjangoObjectType):
     class Meta:
         model = Comment
         fields = '__all__'
+    
+    def resolve_post(self, info):
+        return load_post(self, info)
 
 
 class LikeType(DjangoObjectType):
     class Meta:
         model = Like
         fields = '__all__'
+    
+    def resolve_post(self, info):
+        return load_post(self, info)
 
 
 class ShareType(DjangoObjectType):
     class Meta:
         model = Share
         fields = '__all__'
+    
+    def resolve_post(self, info):
+        return load_post(self, info)
+
+
+# Largest page allUsers returns, whatever limit the client asks for
+MAX_USERS_PAGE_SIZE = 100
 
 
 # Query Resolvers
@@ -42,44 +84,44 @@ class Query(graphene.ObjectType):
     user_posts = graphene.List(PostType, user_id=graphene.Int(required=True))
     post_comments = graphene.List(CommentType, post_id=graphene.Int(required=True))
     post_likes = graphene.List(LikeType, post_id=graphene.Int(required=True))
-    all_users = graphene.List(UserType)
+    all_users = graphene.List(UserType, limit=graphene.Int(), offset=graphene.Int())
     
     def resolve_all_posts(self, info, limit=10, offset=0):
-        """Fetch all posts with pagination and optimized queries"""
-        return Post.objects.select_related('author').prefetch_related(
-            'comments__author',
-            'likes__user',
-            'shares__user'
-        ).all()[offset:offset+limit]
+        """Fetch all posts with pagination; relations are batched by loaders"""
+        posts = list(
+            Post.objects.select_related('author')
+            .only(*project_fields(info, Post, POST_FIELD_SOURCES))[offset:offset+limit]
+        )
+        get_loaders(info).prime(posts)
+        return posts
     
     def resolve_post(self, info, id):
-        """Fetch a single post by ID with optimized queries"""
-        try:
-            return Post.objects.select_related('author').prefetch_related(
-                'comments__author',
-                'likes__user',
-                'shares__user'
-            ).get(pk=id)
-        except Post.DoesNotExist:
-            return None
+        """Fetch a single post by ID through the post cache"""
+        return get_cached_post(id)
     
     def resolve_user_posts(self, info, user_id):
-        """Fetch all posts by a specific user with optimizations"""
-        return Post.objects.filter(author_id=user_id).select_related(
-            'author'
-        ).prefetch_related('comments__author', 'likes__user')
+        """Fetch all posts by a specific user; relations are batched by loaders"""
+        posts = list(
+            Post.objects.filter(author_id=user_id).select_related('author')
+            .only(*project_fields(info, Post, POST_FIELD_SOURCES))
+        )
+        get_loaders(info).prime(posts)
+        return posts
     
     def resolve_post_comments(self, info, post_id):
         """Fetch all comments for a specific post"""
-        return Comment.objects.filter(post_id=post_id).select_related('author', 'post')
+        return Comment.objects.filter(post_id=post_id).select_related('author')
     
     def resolve_post_likes(self, info, post_id):
         """Fetch all likes for a specific post"""
-        return Like.objects.filter(post_id=post_id).select_related('user', 'post')
+        return Like.objects.filter(post_id=post_id).select_related('user')
     
-    def resolve_all_users(self, info):
-        """Fetch all users"""
-        return User.objects.all()
+    def resolve_all_users(self, info, limit=10, offset=0):
+        """Fetch users with capped pagination, loading only the exposed columns"""
+        limit = min(limit, MAX_USERS_PAGE_SIZE)
+        return User.objects.only(
+            'id', 'username', 'email', 'first_name', 'last_name'
+        ).order_by('id')[offset:offset+limit]
 
 
 # Mutation Resolvers
@@ -175,13 +217,16 @@ class CreateComment(graphene.Mutation):
         
         try:
             post = Post.objects.get(pk=post_id)
-            comment = Comment.objects.create(
-                post=post,
-                author=user,
-                content=content
-            )
-            post.comments_count += 1
-            post.save()
+            with transaction.atomic():
+                comment = Comment.objects.create(
+                    post=post,
+                    author=user,
+                    content=content
+                )
+                Post.objects.filter(pk=post.pk).update(comments_count=F('comments_count') + 1)
+                # The payload returns this instance, so pick up the new count
+                post.refresh_from_db(fields=['comments_count'])
+                invalidate_post(post.pk)
             return CreateComment(comment=comment, success=True, message="Comment added successfully")
         except Post.DoesNotExist:
             return CreateComment(success=False, message="Post not found", comment=None)
@@ -204,15 +249,40 @@ class DeleteComment(graphene.Mutation):
             if comment.author != user:
                 return DeleteComment(success=False, message="Not authorized to delete this comment")
             
-            post = comment.post
-            comment.delete()
-            post.comments_count = max(0, post.comments_count - 1)
-            post.save()
+            post_id = comment.post_id
+            with transaction.atomic():
+                comment.delete()
+                Post.objects.filter(pk=post_id).update(
+                    comments_count=Greatest(F('comments_count') - 1, 0)
+                )
+                invalidate_post(post_id)
             return DeleteComment(success=True, message="Comment deleted successfully")
         except Comment.DoesNotExist:
             return DeleteComment(success=False, message="Comment not found")
 
 
+def insert_like(post_id, user):
+    """
+    Insert a like with a single INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Returns the new Like, or None if the user already liked the post.
+    """
+    like = Like(post_id=post_id, user=user, created_at=timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {table} (post_id, user_id, created_at) VALUES (%s, %s, %s) '
+            'ON CONFLICT (post_id, user_id) DO NOTHING RETURNING id'.format(
+                table=connection.ops.quote_name(Like._meta.db_table)
+            ),
+            [post_id, user.id, connection.ops.adapt_datetimefield_value(like.created_at)],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    like.id = row[0]
+    return like
+
+
 class LikePost(graphene.Mutation):
     class Arguments:
         post_id = graphene.Int(required=True)
@@ -226,21 +296,26 @@ class LikePost(graphene.Mutation):
         if not user.is_authenticated:
             return LikePost(success=False, message="Authentication required", like=None)
         
-        try:
-            post = Post.objects.get(pk=post_id)
-            like, created = Like.objects.get_or_create(post=post, user=user)
+        with transaction.atomic():
+            like = insert_like(post_id, user)
             
-            if created:
-                post.likes_count += 1
-                post.save()
-                return LikePost(success=True, message="Post liked successfully", like=like)
+            if like is not None:
+                updated = Post.objects.filter(pk=post_id).update(likes_count=F('likes_count') + 1)
             else:
-                like.delete()
-                post.likes_count = max(0, post.likes_count - 1)
-                post.save()
-                return LikePost(success=True, message="Post unliked successfully", like=None)
-        except Post.DoesNotExist:
-            return LikePost(success=False, message="Post not found", like=None)
+                Like.objects.filter(post_id=post_id, user=user).delete()
+                updated = Post.objects.filter(pk=post_id).update(
+                    likes_count=Greatest(F('likes_count') - 1, 0)
+                )
+            
+            # The counter update doubles as the post existence check
+            if not updated:
+                transaction.set_rollback(True)
+                return LikePost(success=False, message="Post not found", like=None)
+            invalidate_post(post_id)
+        
+        if like is not None:
+            return LikePost(success=True, message="Post liked successfully", like=like)
+        return LikePost(success=True, message="Post unliked successfully", like=None)
 
 
 class SharePost(graphene.Mutation):
@@ -258,9 +333,12 @@ class SharePost(graphene.Mutation):
         
         try:
             post = Post.objects.get(pk=post_id)
-            share = Share.objects.create(post=post, user=user)
-            post.shares_count += 1
-            post.save()
+            with transaction.atomic():
+                share = Share.objects.create(post=post, user=user)
+                Post.objects.filter(pk=post.pk).update(shares_count=F('shares_count') + 1)
+                # The payload returns this instance, so pick up the new count
+                post.refresh_from_db(fields=['shares_count'])
+                invalidate_post(post.pk)
             return SharePost(share=share, success=True, message="Post shared successfully")
         except Post.DoesNotExist:
             return SharePost(success=False, message="Post not found", share=None)
@@ -1,23 +1,37 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from .models import Post, Comment, Like, Share
+from .cache import get_cached_post, post_cache_key
+from .persisted_queries import load_persisted_documents, query_id
+from .schema import schema
+
+
+# Tests never authenticate with a password, so skip hashing altogether
+UNUSABLE_PASSWORD = '!'
 
 
 class PostModelTest(TestCase):
     """Test cases for the Post model"""
     
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Set up test data"""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
-        )
-        self.user2 = User.objects.create_user(
-            username='testuser2',
-            email='test2@example.com',
-            password='testpass123'
-        )
+        cls.user, cls.user2 = User.objects.bulk_create([
+            User(username='testuser', email='test@example.com', password=UNUSABLE_PASSWORD),
+            User(username='testuser2', email='test2@example.com', password=UNUSABLE_PASSWORD),
+        ])
     
     def test_post_creation(self):
         """Test creating a post"""
@@ -41,6 +55,18 @@ class PostModelTest(TestCase):
         )
         self.assertEqual(post.image_url, 'https://example.com/image.jpg')
     
+    @override_settings(CDN_BASE_URL='https://cdn.example.com')
+    def test_post_image_stored_as_cdn_key(self):
+        """Test that CDN image URLs are stored as object keys"""
+        post = Post.objects.create(
+            author=self.user,
+            content='Post with CDN image',
+            image_url='https://cdn.example.com/abc123.jpg'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.image_key, 'abc123.jpg')
+        self.assertEqual(post.image_url, 'https://cdn.example.com/abc123.jpg')
+    
     def test_post_str_method(self):
         """Test the string representation of a post"""
         post = Post.objects.create(
@@ -62,14 +88,12 @@ class PostModelTest(TestCase):
 class CommentModelTest(TestCase):
     """Test cases for the Comment model"""
     
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Set up test data"""
-        self.user = User.objects.create_user(
-            username='testuser',
-            password='testpass123'
-        )
-        self.post = Post.objects.create(
-            author=self.user,
+        cls.user = User.objects.create(username='testuser', password=UNUSABLE_PASSWORD)
+        cls.post = Post.objects.create(
+            author=cls.user,
             content='Test post'
         )
     
@@ -97,14 +121,12 @@ class CommentModelTest(TestCase):
 class LikeModelTest(TestCase):
     """Test cases for the Like model"""
     
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Set up test data"""
-        self.user = User.objects.create_user(
-            username='testuser',
-            password='testpass123'
-        )
-        self.post = Post.objects.create(
-            author=self.user,
+        cls.user = User.objects.create(username='testuser', password=UNUSABLE_PASSWORD)
+        cls.post = Post.objects.create(
+            author=cls.user,
             content='Test post'
         )
     
@@ -137,14 +159,12 @@ class LikeModelTest(TestCase):
 class ShareModelTest(TestCase):
     """Test cases for the Share model"""
     
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Set up test data"""
-        self.user = User.objects.create_user(
-            username='testuser',
-            password='testpass123'
-        )
-        self.post = Post.objects.create(
-            author=self.user,
+        cls.user = User.objects.create(username='testuser', password=UNUSABLE_PASSWORD)
+        cls.post = Post.objects.create(
+            author=cls.user,
             content='Test post'
         )
     
@@ -169,18 +189,15 @@ class ShareModelTest(TestCase):
 class InteractionTest(TestCase):
     """Test cases for interactions between models"""
     
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Set up test data"""
-        self.user1 = User.objects.create_user(
-            username='user1',
-            password='testpass123'
-        )
-        self.user2 = User.objects.create_user(
-            username='user2',
-            password='testpass123'
-        )
-        self.post = Post.objects.create(
-            author=self.user1,
+        cls.user1, cls.user2 = User.objects.bulk_create([
+            User(username='user1', password=UNUSABLE_PASSWORD),
+            User(username='user2', password=UNUSABLE_PASSWORD),
+        ])
+        cls.post = Post.objects.create(
+            author=cls.user1,
             content='Test post for interactions'
         )
     
@@ -201,6 +218,36 @@ class InteractionTest(TestCase):
         self.assertIn(comment1, self.post.comments.all())
         self.assertIn(comment2, self.post.comments.all())
     
+    def test_reconcile_counters(self):
+        """Test that cached counters are recomputed from the related rows"""
+        Comment.objects.create(post=self.post, author=self.user2, content='Comment')
+        Like.objects.create(post=self.post, user=self.user1)
+        Like.objects.create(post=self.post, user=self.user2)
+        Post.objects.filter(pk=self.post.pk).update(shares_count=5)
+        
+        call_command('reconcile_counters', stdout=StringIO())
+        
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(self.post.shares_count, 0)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_reconcile_counters_invalidates_cached_posts(self):
+        """Test that only posts whose counters drifted are dropped from the cache"""
+        cache.clear()
+        other_post = Post.objects.create(author=self.user2, content='Other post')
+        Like.objects.create(post=self.post, user=self.user2)
+        get_cached_post(self.post.pk)
+        get_cached_post(other_post.pk)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_counters', stdout=StringIO())
+        
+        self.assertIsNone(cache.get(post_cache_key(self.post.pk)))
+        self.assertIsNotNone(cache.get(post_cache_key(other_post.pk)))
+        self.assertEqual(get_cached_post(self.post.pk).likes_count, 1)
+    
     def test_post_with_multiple_likes(self):
         """Test adding multiple likes to a post"""
         like1 = Like.objects.create(post=self.post, user=self.user1)
@@ -218,3 +265,288 @@ class InteractionTest(TestCase):
         self.assertEqual(self.user1.posts.count(), 3)  # Including setUp post
         self.assertIn(post1, self.user1.posts.all())
         self.assertIn(post2, self.user1.posts.all())
+
+
+class QueryTest(TestCase):
+    """Test cases for the GraphQL queries"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data"""
+        cls.user = User.objects.create(username='testuser', password=UNUSABLE_PASSWORD)
+        cls.posts = [
+            Post.objects.create(author=cls.user, content=f'Post {i}')
+            for i in range(3)
+        ]
+        Comment.objects.bulk_create([
+            Comment(post=post, author=cls.user, content='Comment')
+            for post in cls.posts
+        ])
+    
+    def execute(self, query):
+        request = RequestFactory().post('/graphql/')
+        request.user = self.user
+        result = schema.execute(query, context_value=request)
+        self.assertIsNone(result.errors)
+        return result.data
+    
+    def test_all_posts_batches_comments(self):
+        """Test that comments for a page of posts are fetched in one query"""
+        with self.assertNumQueries(2):
+            data = self.execute('{ allPosts { id comments { content author { username } } } }')
+        self.assertEqual(len(data['allPosts']), 3)
+        for post in data['allPosts']:
+            self.assertEqual(post['comments'], [{'content': 'Comment', 'author': {'username': 'testuser'}}])
+    
+    def test_all_posts_skips_unselected_relations(self):
+        """Test that relations are not queried when not selected"""
+        with self.assertNumQueries(1):
+            self.execute('{ allPosts { id content } }')
+    
+    def test_liked_by_me_is_batched(self):
+        """Test that likedByMe is answered for a page of posts in one query"""
+        Like.objects.create(post=self.posts[1], user=self.user)
+        with self.assertNumQueries(2):
+            data = self.execute('{ allPosts { content likedByMe } }')
+        liked = {post['content']: post['likedByMe'] for post in data['allPosts']}
+        self.assertEqual(liked, {'Post 0': False, 'Post 1': True, 'Post 2': False})
+    
+    def test_post_comments_loads_post_once(self):
+        """Test that the parent post is loaded once instead of joined per comment"""
+        post = self.posts[0]
+        Comment.objects.create(post=post, author=self.user, content='Another')
+        with CaptureQueriesContext(connection) as queries:
+            data = self.execute('{ postComments(postId: %d) { content post { content } } }' % post.id)
+        self.assertEqual(len(data['postComments']), 2)
+        for comment in data['postComments']:
+            self.assertEqual(comment['post'], {'content': 'Post 0'})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('JOIN "posts_post"', queries[0]['sql'])
+    
+    def test_all_posts_image_url(self):
+        """Test that imageUrl loads the image key without extra queries"""
+        Post.objects.filter(pk=self.posts[-1].pk).update(image_key='https://example.com/a.jpg')
+        with self.assertNumQueries(1):
+            data = self.execute('{ allPosts(limit: 1) { imageUrl } }')
+        self.assertEqual(data['allPosts'], [{'imageUrl': 'https://example.com/a.jpg'}])
+    
+    def test_post_query_defers_unselected_columns(self):
+        """Test that only the selected post columns are loaded"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.execute(
+                '{ allPosts(limit: 1) { id ...counts } } fragment counts on PostType { likesCount }'
+            )
+        self.assertEqual(data['allPosts'], [{'id': str(self.posts[-1].id), 'likesCount': 0}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"content"', queries[0]['sql'])
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_post_query_is_cached_until_post_changes(self):
+        """Test that a post is served from cache and invalidated on update"""
+        cache.clear()
+        post = self.posts[0]
+        query = '{ post(id: %d) { content likesCount } }' % post.id
+        self.execute(query)
+        with self.assertNumQueries(0):
+            data = self.execute(query)
+        self.assertEqual(data['post'], {'content': 'Post 0', 'likesCount': 0})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.execute('mutation { likePost(postId: %d) { success } }' % post.id)
+        data = self.execute(query)
+        self.assertEqual(data['post']['likesCount'], 1)
+    
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_cached_post_resolves_author_per_request(self):
+        """Test that the cached post excludes its author and shows profile edits"""
+        cache.clear()
+        post = self.posts[0]
+        query = '{ post(id: %d) { author { username } } }' % post.id
+        self.execute(query)
+        self.assertFalse(Post.author.is_cached(cache.get(post_cache_key(post.id))))
+        
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        data = self.execute(query)
+        self.assertEqual(data['post']['author']['username'], 'renamed')
+    
+    def test_all_users_is_paginated(self):
+        """Test that users are returned in pages ordered by id"""
+        User.objects.create(username='testuser2', password=UNUSABLE_PASSWORD)
+        data = self.execute('{ allUsers(limit: 1, offset: 1) { username } }')
+        self.assertEqual(data['allUsers'], [{'username': 'testuser2'}])
+    
+    @patch('posts.schema.MAX_USERS_PAGE_SIZE', 1)
+    def test_all_users_limit_is_capped(self):
+        """Test that allUsers never returns more than the maximum page size"""
+        User.objects.create(username='testuser2', password=UNUSABLE_PASSWORD)
+        data = self.execute('{ allUsers(limit: 1000) { username } }')
+        self.assertEqual(data['allUsers'], [{'username': 'testuser'}])
+
+
+class InteractionMutationTest(TestCase):
+    """Test cases for the GraphQL interaction mutations"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data"""
+        cls.user = User.objects.create(username='testuser', password=UNUSABLE_PASSWORD)
+        cls.post = Post.objects.create(
+            author=cls.user,
+            content='Test post'
+        )
+    
+    def execute(self, query):
+        request = RequestFactory().post('/graphql/')
+        request.user = self.user
+        result = schema.execute(query, context_value=request)
+        self.assertIsNone(result.errors)
+        return result.data
+    
+    def test_like_post_toggles_likes_count(self):
+        """Test that liking twice likes then unlikes the post"""
+        mutation = 'mutation { likePost(postId: %d) { success message } }' % self.post.id
+        
+        data = self.execute(mutation)
+        self.assertEqual(data['likePost']['message'], 'Post liked successfully')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertTrue(Like.objects.filter(post=self.post, user=self.user).exists())
+        
+        data = self.execute(mutation)
+        self.assertEqual(data['likePost']['message'], 'Post unliked successfully')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertFalse(Like.objects.filter(post=self.post).exists())
+    
+    def test_like_missing_post(self):
+        """Test that liking a missing post fails without creating a like"""
+        data = self.execute('mutation { likePost(postId: %d) { success message } }' % (self.post.id + 1))
+        self.assertEqual(data['likePost'], {'success': False, 'message': 'Post not found'})
+        self.assertFalse(Like.objects.exists())
+    
+    def test_delete_comment_does_not_go_below_zero(self):
+        """Test that the comments counter is clamped at zero"""
+        comment = Comment.objects.create(post=self.post, author=self.user, content='Comment')
+        
+        self.execute('mutation { deleteComment(commentId: %d) { success } }' % comment.id)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+    
+    def test_mutation_payloads_return_updated_counts(self):
+        """Test that comment and share payloads expose the incremented counters"""
+        data = self.execute(
+            'mutation { createComment(postId: %d, content: "Hi") { comment { post { commentsCount } } } }'
+            % self.post.id
+        )
+        self.assertEqual(data['createComment']['comment']['post']['commentsCount'], 1)
+        
+        data = self.execute(
+            'mutation { sharePost(postId: %d) { share { post { sharesCount } } } }' % self.post.id
+        )
+        self.assertEqual(data['sharePost']['share']['post']['sharesCount'], 1)
+    
+    def test_create_comment_and_share_update_counts(self):
+        """Test that comment and share mutations increment their counters"""
+        self.execute('mutation { createComment(postId: %d, content: "Hi") { success } }' % self.post.id)
+        self.execute('mutation { sharePost(postId: %d) { success } }' % self.post.id)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.post.shares_count, 1)
+
+
+class PersistedQueryTest(TestCase):
+    """Test cases for persisted GraphQL queries"""
+    
+    query = '{ allPosts { content } }'
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data"""
+        cls.user = User.objects.create(username='testuser', password=UNUSABLE_PASSWORD)
+        Post.objects.create(author=cls.user, content='Test post')
+    
+    def setUp(self):
+        self.load_manifest({query_id(self.query): self.query})
+    
+    def load_manifest(self, manifest):
+        """Write a manifest file and load it as if at startup"""
+        manifest_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        with manifest_file:
+            json.dump(manifest, manifest_file)
+        self.addCleanup(os.remove, manifest_file.name)
+        
+        # Cleanups run in reverse: restore settings, then reload the real manifest
+        self.addCleanup(load_persisted_documents)
+        settings_override = override_settings(GRAPHQL_PERSISTED_QUERIES_MANIFEST=manifest_file.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        load_persisted_documents()
+    
+    def post(self, body):
+        return self.client.post('/graphql/', body, content_type='application/json').json()
+    
+    def test_persisted_query_by_id(self):
+        """Test that a known query id executes the persisted document"""
+        data = self.post({'queryId': query_id(self.query)})
+        self.assertEqual(data, {'data': {'allPosts': [{'content': 'Test post'}]}})
+    
+    def test_unknown_query_id_falls_back_to_query(self):
+        """Test that an unknown query id uses the query string"""
+        data = self.post({'queryId': 'unknown', 'query': '{ allPosts { id } }'})
+        self.assertEqual(len(data['data']['allPosts']), 1)
+    
+    def test_invalid_manifest_fails_to_load(self):
+        """Test that a manifest query failing validation is rejected at load time"""
+        query = '{ allPosts { missingField } }'
+        with self.assertRaises(ImproperlyConfigured):
+            self.load_manifest({query_id(query): query})
+    
+    def test_mismatched_manifest_hash_fails_to_load(self):
+        """Test that a manifest id must be the SHA-256 of its query"""
+        with self.assertRaises(ImproperlyConfigured):
+            self.load_manifest({'not-a-hash': self.query})
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class PostAdminTest(TestCase):
+    """Test cases for the Post admin"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data"""
+        cls.user = User.objects.create(
+            username='admin', password=UNUSABLE_PASSWORD, is_staff=True, is_superuser=True
+        )
+        cls.long_post = Post.objects.create(author=cls.user, content='A' * 60)
+        cls.short_post = Post.objects.create(author=cls.user, content='Short post')
+    
+    def setUp(self):
+        self.client.force_login(self.user)
+    
+    def test_changelist_shows_truncated_preview(self):
+        """Test that the changelist renders previews without loading full content"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/posts/post/')
+        self.assertContains(response, 'A' * 50 + '...')
+        self.assertContains(response, f'Select this object for an action - admin: {"A" * 50}"')
+        self.assertContains(response, 'Short post')
+        self.assertNotContains(response, 'A' * 51)
+        for query in queries:
+            columns = re.sub(r'SUBSTR\w*\("posts_post"\."content"', '', query['sql'].split(' FROM ')[0])
+            self.assertNotIn('"posts_post"."content"', columns)
+    
+    def test_change_form_save_updates_timestamp(self):
+        """Test that saving the change form writes all columns, including updated_at"""
+        updated_at = self.short_post.updated_at
+        response = self.client.post(f'/admin/posts/post/{self.short_post.pk}/change/', {
+            'author': self.user.pk,
+            'content': 'Edited post',
+            'image_key': '',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.short_post.refresh_from_db()
+        self.assertEqual(self.short_post.content, 'Edited post')
+        self.assertGreater(self.short_post.updated_at, updated_at)
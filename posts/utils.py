@@ -0,0 +1,44 @@
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+def selected_fields(info):
+    """Return the snake_case names of the fields selected on the current field"""
+    names = set()
+    for field_node in info.field_nodes:
+        _collect_fields(field_node.selection_set, info.fragments, names)
+    return names
+
+
+def _collect_fields(selection_set, fragments, names):
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            names.add(to_snake_case(selection.name.value))
+        elif isinstance(selection, FragmentSpreadNode):
+            _collect_fields(fragments[selection.name.value].selection_set, fragments, names)
+        elif isinstance(selection, InlineFragmentNode):
+            _collect_fields(selection.selection_set, fragments, names)
+
+
+def project_fields(info, model, sources=None):
+    """
+    Map the GraphQL selection to the model columns to pass to `.only()`.
+
+    `sources` maps computed GraphQL fields to the columns they are derived
+    from. The primary key and every foreign key are always kept so that
+    resolving or traversing a relation never triggers a per-row query for a
+    deferred column.
+    """
+    requested = selected_fields(info)
+    for name, columns in (sources or {}).items():
+        if name in requested:
+            requested.update(columns)
+    fields = [model._meta.pk.name]
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        if field.is_relation or field.name in requested:
+            fields.append(field.name)
+    return fields
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'posts',
     'graphene_django',
     'corsheaders',
@@ -143,19 +144,28 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # Whitenoise configuration for serving static files
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Post images under this base URL are stored as object keys only
+CDN_BASE_URL = config('CDN_BASE_URL', default='').rstrip('/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # GraphQL Configuration
+# The debug middleware wraps every field resolution and traces every SQL
+# query, so it is only enabled in development
 GRAPHENE = {
     'SCHEMA': 'posts.schema.schema',
     'MIDDLEWARE': [
         'graphene_django.debug.DjangoDebugMiddleware',
-    ],
+    ] if DEBUG else [],
 }
 
+# JSON manifest of {sha256: query} extracted from the client at build time;
+# requests may send {"queryId": "<sha256>"} instead of the query string
+GRAPHQL_PERSISTED_QUERIES_MANIFEST = config('GRAPHQL_PERSISTED_QUERIES_MANIFEST', default=None)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -171,11 +181,15 @@ CACHES = {
         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Redis is optional: treat an unreachable server as a cache miss
+            'IGNORE_EXCEPTIONS': True,
         },
         'KEY_PREFIX': 'social_media_feed',
         'TIMEOUT': 300,
     }
 }
 
+DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
+
 # Cache time to live is 15 minutes (900 seconds)
 CACHE_TTL = 60 * 15